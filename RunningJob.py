@@ -1,3 +1,4 @@
+import time
 from typing import List
 
 
@@ -10,20 +11,40 @@ class RunningJob:
         workflow_name: str,
         job_name: str,
         labels: List[str],
+        run_id: int = None,
+        speculative: bool = False,
+        packed_slots: int = None,
+        accept_until: float = None,
     ):
-        """Class to represent a running Github Actions Job on Slurm."""
+        """
+        Class to represent a running Github Actions Job on Slurm.
+        A packed allocation (packed_slots set) runs up to packed_slots jobs, tracked in job_ids,
+        and accepts new jobs until accept_until.
+        """
         self.repo = repo
         self.job_id = job_id
         self.slurm_job_id = slurm_job_id
         self.workflow_name = workflow_name
         self.job_name = job_name
         self.labels = labels
+        self.run_id = run_id
+        self.speculative = speculative
+        self.allocated_at = time.time()
+        self.packed_slots = packed_slots
+        self.job_ids = set()
+        self.idle_since = time.time()
+        self.accept_until = accept_until
+
+    def free_slots(self) -> int:
+        return self.packed_slots - len(self.job_ids) if self.packed_slots else 0
 
     def __str__(self) -> str:
         return (
             f"RunningJob(job_id = {self.job_id}, slurm_job_id = {self.slurm_job_id}, "
             f"workflow_name = {self.workflow_name}, "
-            f"job_name = {self.job_name}, labels = {self.labels})"
+            f"job_name = {self.job_name}, labels = {self.labels}, "
+            f"speculative = {self.speculative}, "
+            f"packed_slots = {self.packed_slots}, job_ids = {sorted(self.job_ids)})"
         )
 
     def __repr__(self) -> str:
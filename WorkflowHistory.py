@@ -0,0 +1,49 @@
+from collections import Counter, OrderedDict
+from typing import List
+
+
+class WorkflowHistory:
+    def __init__(self, max_runs: int):
+        """Class to remember which runner labels recent runs of each workflow needed."""
+        self.max_runs = max_runs
+        # (repo, workflow_id) -> OrderedDict(run_id -> {job_id: labels})
+        self._runs = {}
+
+    def record_job(
+        self, repo: str, workflow_id: int, run_id: int, job_id: int, labels: List[str]
+    ) -> None:
+        """Records that the given job of a workflow run requested the given labels."""
+        runs = self._runs.setdefault((repo, workflow_id), OrderedDict())
+        if run_id not in runs:
+            runs[run_id] = {}
+            while len(runs) > self.max_runs:
+                runs.popitem(last=False)
+        runs[run_id][job_id] = tuple(labels)
+
+    def predict(
+        self, repo: str, workflow_id: int, exclude_run_id: int = None
+    ) -> Counter:
+        """
+        Predicts how many jobs of each label set a new run of the workflow will need.
+        Conservative: a label set is only predicted as many times as every recent run needed it.
+        Returns: Counter mapping labels tuple -> job count (empty if there is no history).
+        """
+        runs = self._runs.get((repo, workflow_id), {})
+        past_runs = [
+            Counter(jobs.values())
+            for run_id, jobs in runs.items()
+            if run_id != exclude_run_id
+        ]
+        if not past_runs:
+            return Counter()
+
+        prediction = Counter()
+        for labels in set().union(*past_runs):
+            prediction[labels] = min(run[labels] for run in past_runs)
+        return +prediction
+
+    def __str__(self) -> str:
+        return f"WorkflowHistory(max_runs = {self.max_runs}, workflows = {len(self._runs)})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
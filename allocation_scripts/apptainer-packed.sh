@@ -0,0 +1,127 @@
+#!/bin/bash
+# Use: ./apptainer-packed.sh <repo-url> <registration-token> <removal-token> <labels> <run-id> <slots> <accept-until> <tmpdisk-per-slot>
+# Runs <slots> ephemeral runners side by side in one Slurm allocation, sharing a single dockerd.
+# Each slot is its own job step, so Slurm confines it to its own CPU, memory and tmpdisk slice.
+# A slot keeps registering a new ephemeral runner after each job until <accept-until> (epoch seconds).
+# Once that time has passed, idle runners are removed so no job starts without time left to finish.
+
+# Function to log messages with a timestamp
+log() {
+    echo "$(date +'%Y-%m-%d %H:%M:%S') $@"
+}
+
+# Check if all required arguments are provided
+if [ $# -lt 8 ]; then
+    log "ERROR: Missing required arguments"
+    log "Usage: $0 <repo-url> <registration-token> <removal-token> <labels> <run-id> <slots> <accept-until> <tmpdisk-per-slot>"
+    exit 1
+fi
+
+export REPO_URL=$1
+export REGISTRATION_TOKEN=$2
+export REMOVAL_TOKEN=$3
+export LABELS=$4
+RUN_ID=$5
+SLOTS=$6
+export ACCEPT_UNTIL=$7
+TMPDISK_PER_SLOT=$8
+
+log "INFO Starting Docker on Slurm"
+start_time=$(date +%s)
+/opt/slurm/bin/slurm-start-dockerd.sh
+export DOCKER_HOST=unix:///tmp/run/docker.sock
+if [ $? -ne 0 ]; then
+    log "ERROR Docker failed to start (non-zero exit code)"
+    exit 1
+fi
+end_time=$(date +%s)
+log "INFO Docker in Slurm started (Duration: $(($end_time - $start_time)) seconds)"
+
+# Load Apptainer
+log "INFO Loading Apptainer"
+source /cvmfs/soft.computecanada.ca/config/profile/bash.sh
+module load apptainer
+
+# Define the Docker image to use
+export ACTIONS_RUNNER_IMAGE="/cvmfs/unpacked.cern.ch/ghcr.io/watonomous/actions-runner-image:main"
+
+# Removes the slot's runner from GitHub. GitHub refuses to remove a runner that is running a job.
+remove_runner() {
+    apptainer exec "instance://$INSTANCE_NAME" /bin/bash -c "export RUNNER_ALLOW_RUNASROOT=1 && /home/runner/config.sh remove --token \"${REMOVAL_TOKEN}\""
+}
+
+# Removes the runner when the allocation is cancelled, so it does not stay registered as offline
+stop_slot() {
+    log "INFO Slot $SLOT: allocation cancelled, removing runner"
+    remove_runner
+    kill $RUNNER_PID 2>/dev/null
+    apptainer instance stop "$INSTANCE_NAME"
+    rm -rf $PARENT_DIR
+    exit 0
+}
+
+# Runs ephemeral runners one after another in the given slot
+run_slot() {
+    SLOT=$1
+    RUNNER_NAME="slurm-${SLURMD_NODENAME}-slot${SLOT}-${SLURM_JOB_ID}"
+    INSTANCE_NAME="ghar-${SLURM_JOB_ID}-${SLOT}"
+    PARENT_DIR="/tmp/runner-${SLURMD_NODENAME}-${SLURM_JOB_ID}-${SLOT}"
+    GITHUB_ACTIONS_WKDIR="$PARENT_DIR/_work"
+    trap stop_slot TERM
+
+    while [ $(date +%s) -lt $ACCEPT_UNTIL ]; do
+        rm -rf $PARENT_DIR
+        mkdir -p $PARENT_DIR $GITHUB_ACTIONS_WKDIR
+        chmod -R 777 $PARENT_DIR
+
+        log "INFO Slot $SLOT: starting runner $RUNNER_NAME"
+        start_time=$(date +%s)
+        # An instance keeps the runner's registration around, so it can be removed from outside run.sh
+        apptainer instance start --writable-tmpfs --containall --fakeroot --bind /dev/fuse --bind /tmp/run/docker.sock:/tmp/run/docker.sock --bind /cvmfs:/cvmfs --bind /tmp:/tmp "$ACTIONS_RUNNER_IMAGE" "$INSTANCE_NAME"
+        apptainer exec "instance://$INSTANCE_NAME" /bin/bash -c "export DOCKER_HOST=unix:///tmp/run/docker.sock && export RUNNER_ALLOW_RUNASROOT=1 && export PYTHONPATH=/home/runner/.local/lib/python3.10/site-packages && /home/runner/config.sh --work \"${GITHUB_ACTIONS_WKDIR}\" --url \"${REPO_URL}\" --token \"${REGISTRATION_TOKEN}\" --labels \"${LABELS}\" --name \"${RUNNER_NAME}\" --unattended --ephemeral --replace && /home/runner/run.sh" &
+        RUNNER_PID=$!
+
+        REMOVED_IDLE=0
+        TRIED_REMOVAL=0
+        while kill -0 $RUNNER_PID 2>/dev/null; do
+            # Tried once only, a busy ephemeral runner exits by itself after its job
+            if [ $TRIED_REMOVAL -eq 0 ] && [ $(date +%s) -ge $ACCEPT_UNTIL ]; then
+                TRIED_REMOVAL=1
+                if remove_runner; then
+                    log "INFO Slot $SLOT: accept window closed, removed idle runner"
+                    REMOVED_IDLE=1
+                    kill $RUNNER_PID
+                else
+                    log "INFO Slot $SLOT: accept window closed, runner is busy, letting its job finish"
+                fi
+            fi
+            sleep 5
+        done
+        wait $RUNNER_PID
+        RUNNER_EXIT_CODE=$?
+        apptainer instance stop "$INSTANCE_NAME"
+        if [ $REMOVED_IDLE -eq 1 ]; then
+            break
+        fi
+        if [ $RUNNER_EXIT_CODE -ne 0 ]; then
+            # Registration or the runner failed, stop filling this slot
+            log "ERROR Slot $SLOT: runner exited with non-zero exit code, closing slot"
+            break
+        fi
+        end_time=$(date +%s)
+        log "INFO Slot $SLOT: runner finished (Duration: $(($end_time - $start_time)) seconds)"
+    done
+
+    rm -rf $PARENT_DIR
+    log "INFO Slot $SLOT: closed"
+}
+export -f log remove_runner stop_slot run_slot
+
+log "INFO Starting $SLOTS runner slots for run $RUN_ID"
+for slot in $(seq 1 $SLOTS); do
+    srun --exact --ntasks=1 --cpus-per-task=$SLURM_CPUS_PER_TASK --gres=tmpdisk:$TMPDISK_PER_SLOT bash -c "run_slot $slot" &
+done
+wait
+
+log "INFO apptainer-packed.sh finished, exiting..."
+exit 0
@@ -7,6 +7,31 @@ NETWORK_TIMEOUT = 30  # seconds for HTTP requests (GitHub API calls)
 SLURM_COMMAND_TIMEOUT = 60  # seconds for SLURM commands (sbatch, sacct, etc.)
 THREAD_SLEEP_TIMEOUT = 5  # seconds between polling cycles for threads
 
+# Speculative allocation: pre-submit runners for queued/requested workflow runs,
+# predicted from the runner labels that recent runs of the same workflow needed
+SPECULATIVE_ALLOCATION_ENABLED = False
+SPECULATIVE_RUNNER_TIMEOUT = (
+    600  # seconds before an unclaimed speculative runner is cancelled
+)
+SPECULATIVE_HISTORY_SIZE = 5  # recent runs per workflow used for prediction
+SPECULATIVE_MAX_OUTSTANDING = 10  # unclaimed speculative runners allowed at once
+
+# Packing: run several ephemeral runners for PACKED_RUNNER_LABEL jobs in one Slurm allocation,
+# each confined to its own CPU and memory slice
+PACKING_ENABLED = False
+PACKED_RUNNER_LABEL = "slurm-runner-small"
+PACK_RUNNER_SCRIPT_PATH = (
+    "apptainer-packed.sh"  # relative path from '/allocation_script'
+)
+PACKED_ALLOCATION_SLOTS = 4  # runners per allocation
+PACKED_ALLOCATION_TIME = "01:00:00"
+# Slots re-register runners with the token fetched at submission, so an allocation stops
+# accepting jobs once that token expires (GitHub registration tokens last 1 hour)
+REGISTRATION_TOKEN_LIFETIME = 55 * 60  # seconds, with a margin for clock skew
+PACKED_ALLOCATION_IDLE_TIMEOUT = (
+    300  # seconds an allocation may hold no jobs before it is released
+)
+
 REPOS_TO_MONITOR = [
     {
         "name": "WATonomous/infra-config",
@@ -4,6 +4,7 @@ import subprocess
 import sys
 import threading
 import time
+from collections import Counter
 from datetime import datetime
 
 import requests
@@ -11,9 +12,25 @@ from dotenv import load_dotenv
 
 from config import ALLOCATE_RUNNER_SCRIPT_PATH, REPOS_TO_MONITOR
 from KubernetesLogFormatter import KubernetesLogFormatter
-from runner_size_config import get_runner_resources
+from runner_size_config import get_runner_resources, get_time_limit_seconds
 from config import NETWORK_TIMEOUT, SLURM_COMMAND_TIMEOUT, THREAD_SLEEP_TIMEOUT
+from config import (
+    SPECULATIVE_ALLOCATION_ENABLED,
+    SPECULATIVE_HISTORY_SIZE,
+    SPECULATIVE_MAX_OUTSTANDING,
+    SPECULATIVE_RUNNER_TIMEOUT,
+)
+from config import (
+    PACK_RUNNER_SCRIPT_PATH,
+    PACKED_ALLOCATION_IDLE_TIMEOUT,
+    PACKED_ALLOCATION_SLOTS,
+    PACKED_ALLOCATION_TIME,
+    PACKED_RUNNER_LABEL,
+    PACKING_ENABLED,
+    REGISTRATION_TOKEN_LIFETIME,
+)
 from RunningJob import RunningJob
+from WorkflowHistory import WorkflowHistory
 
 logger = logging.getLogger()
 log_formatter = KubernetesLogFormatter()
@@ -50,6 +67,26 @@ allocated_jobs = {}
 # A small flag used for logging "Polling for queued workflows..." only when we don't allocate anything.
 POLLED_WITHOUT_ALLOCATING = False
 
+# Speculative runners not yet claimed by a job, keyed by SLURM job ID.
+# Once claimed, a speculative runner moves to allocated_jobs under the job that claimed it.
+speculative_jobs = {}
+speculative_lock = threading.Lock()
+
+# Workflow runs we already speculated for, keyed by (repo_name, run_id), oldest first.
+speculated_runs = {}
+MAX_SPECULATED_RUNS = 1000
+
+workflow_history = WorkflowHistory(max_runs=SPECULATIVE_HISTORY_SIZE)
+speculation_stats = {"submitted": 0, "hits": 0, "misses": 0, "ended_unclaimed": 0}
+
+# Packed allocations running several runners each, keyed by SLURM job ID.
+# Every job assigned to a packed allocation is also in allocated_jobs, pointing to the same RunningJob.
+packed_allocations = {}
+packed_lock = threading.Lock()
+
+# ETags of the last job status response for jobs in packed allocations, keyed by (repo_name, job_id).
+packed_job_etags = {}
+
 
 def get_gh_api(url, token, etag=None):
     """
@@ -115,24 +152,32 @@ def poll_github_actions_and_allocate_runners(token, sleep_time=THREAD_SLEEP_TIME
 
     logger.info(f"Starting GitHub Actions polling thread with {sleep_time}s intervals")
 
+    # Requested runs have no jobs yet, so they are only useful for speculation
+    run_statuses = ["queued"]
+    if SPECULATIVE_ALLOCATION_ENABLED:
+        run_statuses.append("requested")
+
     while True:
         try:
             something_allocated = False
 
             for repo in REPOS_TO_MONITOR:
-                queued_url = f"{repo['api_base_url']}/actions/runs?status=queued"
-                data, _ = get_gh_api(queued_url, token)
-
-                if data:
-                    new_allocations = allocate_runners_for_jobs(
-                        workflow_data=data,
-                        token=token,
-                        repo_api_base_url=repo["api_base_url"],
-                        repo_url=repo["repo_url"],
-                        repo_name=repo["name"],
+                for run_status in run_statuses:
+                    runs_url = (
+                        f"{repo['api_base_url']}/actions/runs?status={run_status}"
                     )
-                    if new_allocations > 0:
-                        something_allocated = True
+                    data, _ = get_gh_api(runs_url, token)
+
+                    if data:
+                        new_allocations = allocate_runners_for_jobs(
+                            workflow_data=data,
+                            token=token,
+                            repo_api_base_url=repo["api_base_url"],
+                            repo_url=repo["repo_url"],
+                            repo_name=repo["name"],
+                        )
+                        if new_allocations > 0:
+                            something_allocated = True
 
             if not something_allocated and not POLLED_WITHOUT_ALLOCATING:
                 logger.info("Polling for queued workflows...")
@@ -173,9 +218,14 @@ def allocate_runners_for_jobs(
 ):
     """
     For each queued job in a workflow, allocate the ephemeral SLURM runner if appropriate.
+    Speculative runners are only submitted once the queued jobs of every run are handled.
     Returns the count of new allocations made.
     """
     new_allocations = 0
+    runs_to_speculate = []
+    # Fetched at most once, and only when a queued job may claim a speculative runner
+    busy_checked = False
+    busy_slurm_job_ids = None
 
     if "workflow_runs" not in workflow_data:
         logger.error("No workflow_runs in data.")
@@ -184,8 +234,36 @@ def allocate_runners_for_jobs(
     number_of_queued_workflows = len(workflow_data["workflow_runs"])
 
     for i in range(number_of_queued_workflows):
-        workflow_id = workflow_data["workflow_runs"][i]["id"]
+        workflow_run = workflow_data["workflow_runs"][i]
+        workflow_id = workflow_run["id"]
         job_data = get_all_jobs(workflow_id, token, repo_api_base_url)
+
+        if SPECULATIVE_ALLOCATION_ENABLED:
+            record_workflow_history(workflow_run, job_data, repo_name)
+            runs_to_speculate.append((workflow_run, job_data))
+
+            # Claim runners that already picked up a job before reserving any for queued jobs
+            for job in sorted(job_data, key=lambda job: job["status"] == "queued"):
+                if (repo_name, job["id"]) in allocated_jobs:
+                    continue
+                if job["status"] == "queued" and not busy_checked:
+                    with speculative_lock:
+                        has_unclaimed = any(
+                            running_job.repo == repo_name
+                            for running_job in speculative_jobs.values()
+                        )
+                    if has_unclaimed:
+                        # Runners GitHub already gave a job must not be reserved for another one
+                        busy_checked = True
+                        busy_slurm_job_ids = get_busy_runner_slurm_job_ids(
+                            token, repo_api_base_url
+                        )
+                        if busy_slurm_job_ids is not None:
+                            drop_busy_speculative_runners(repo_name, busy_slurm_job_ids)
+                claim_speculative_runner(
+                    job, repo_name, claim_queued=busy_slurm_job_ids is not None
+                )
+
         if not job_data:
             continue
 
@@ -202,9 +280,138 @@ def allocate_runners_for_jobs(
                 if allocated:
                     new_allocations += 1
 
+    for workflow_run, job_data in runs_to_speculate:
+        new_allocations += speculate_runners_for_run(
+            workflow_run=workflow_run,
+            job_data=job_data,
+            token=token,
+            repo_api_base_url=repo_api_base_url,
+            repo_url=repo_url,
+            repo_name=repo_name,
+        )
+
     return new_allocations
 
 
+def get_runner_tokens(token, repo_api_base_url):
+    """
+    Fetches a runner registration token and a runner removal token for the repo.
+    Returns: (registration_token, removal_token) or (None, None) on failure.
+    """
+    headers = {
+        "Authorization": f"token {token}",
+        "Accept": "application/vnd.github.v3+json",
+    }
+
+    reg_url = f"{repo_api_base_url}/actions/runners/registration-token"
+    remove_url = f"{repo_api_base_url}/actions/runners/remove-token"
+
+    try:
+        reg_resp = requests.post(reg_url, headers=headers, timeout=NETWORK_TIMEOUT)
+        reg_resp.raise_for_status()
+        reg_data = reg_resp.json()
+        registration_token = reg_data["token"]
+        logger.debug("Successfully obtained registration token")
+    except requests.exceptions.Timeout:
+        logger.error(
+            f"Registration token request timed out after {NETWORK_TIMEOUT} seconds"
+        )
+        return None, None
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Failed to get registration token: {e}")
+        return None, None
+
+    # recommended small delay https://docs.github.com/en/rest/using-the-rest-api/best-practices-for-using-the-rest-api?apiVersion=2022-11-28#pause-between-mutative-requests
+    time.sleep(1)
+
+    # Get removal token
+    try:
+        remove_resp = requests.post(
+            remove_url, headers=headers, timeout=NETWORK_TIMEOUT
+        )
+        remove_resp.raise_for_status()
+        remove_data = remove_resp.json()
+        removal_token = remove_data["token"]
+    except requests.exceptions.Timeout:
+        logger.error(f"Removal token request timed out after {NETWORK_TIMEOUT} seconds")
+        return None, None
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Failed to get removal token: {e}")
+        return None, None
+
+    return registration_token, removal_token
+
+
+def submit_runner_allocation(
+    slurm_job_name,
+    runner_size_label,
+    repo_url,
+    registration_token,
+    removal_token,
+    labels,
+    run_id,
+):
+    """
+    Submits the sbatch allocation for an ephemeral runner with the given labels.
+    Returns the SLURM job ID if successful, None otherwise.
+    """
+    runner_resources = get_runner_resources(runner_size_label)
+
+    # sbatch resource allocation command
+    command = [
+        "sbatch",
+        "--output=/var/log/slurm-ci/slurm-ci-%j.out",
+        f"--job-name={slurm_job_name}",
+        f"--mem-per-cpu={runner_resources['mem-per-cpu']}",
+        f"--cpus-per-task={runner_resources['cpu']}",
+        f"--gres=tmpdisk:{runner_resources['tmpdisk']}",
+        f"--time={runner_resources['time']}",
+        ALLOCATE_RUNNER_SCRIPT_PATH,  # allocate-ephemeral-runner-from-docker.sh
+        repo_url,
+        registration_token,
+        removal_token,
+        ",".join(labels),
+        str(run_id),
+    ]
+
+    return run_sbatch(command)
+
+
+def run_sbatch(command):
+    """
+    Runs the given sbatch command. Returns the SLURM job ID if successful, None otherwise.
+    """
+    logger.info(f"Running command: {' '.join(command)}")
+    try:
+        result = subprocess.run(
+            command, capture_output=True, text=True, timeout=SLURM_COMMAND_TIMEOUT
+        )
+        output = result.stdout.strip()
+        error_output = result.stderr.strip()
+        logger.info(f"Command stdout: {output}")
+        if error_output:
+            logger.error(f"Command stderr: {error_output}")
+
+        # Attempt to parse the SLURM job ID from output (e.g. "Submitted batch job 3828")
+        if result.returncode == 0:
+            try:
+                return int(output.split()[-1])
+            except (IndexError, ValueError) as parse_err:
+                logger.error(
+                    f"Failed to parse SLURM job ID from: {output}. Error: {parse_err}"
+                )
+        else:
+            logger.error(f"sbatch command failed with return code {result.returncode}")
+    except subprocess.TimeoutExpired:
+        logger.error(
+            f"SLURM command timed out after {SLURM_COMMAND_TIMEOUT} seconds: {' '.join(command)}"
+        )
+    except subprocess.SubprocessError as e:
+        logger.error(f"Subprocess error running SLURM command: {e}")
+
+    return None
+
+
 def allocate_actions_runner(job_id, token, repo_api_base_url, repo_url, repo_name):
     """
     Allocates a runner for the given job ID. Returns True if successful, False otherwise.
@@ -221,54 +428,6 @@ def allocate_actions_runner(job_id, token, repo_api_base_url, repo_url, repo_nam
     POLLED_WITHOUT_ALLOCATING = False
 
     try:
-        # Get registration token
-        headers = {
-            "Authorization": f"token {token}",
-            "Accept": "application/vnd.github.v3+json",
-        }
-
-        reg_url = f"{repo_api_base_url}/actions/runners/registration-token"
-        remove_url = f"{repo_api_base_url}/actions/runners/remove-token"
-
-        try:
-            reg_resp = requests.post(reg_url, headers=headers, timeout=NETWORK_TIMEOUT)
-            reg_resp.raise_for_status()
-            reg_data = reg_resp.json()
-            registration_token = reg_data["token"]
-            logger.debug("Successfully obtained registration token")
-        except requests.exceptions.Timeout:
-            logger.error(
-                f"Registration token request timed out after {NETWORK_TIMEOUT} seconds"
-            )
-            del allocated_jobs[(repo_name, job_id)]
-            return False
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to get registration token: {e}")
-            del allocated_jobs[(repo_name, job_id)]
-            return False
-
-        # recommended small delay https://docs.github.com/en/rest/using-the-rest-api/best-practices-for-using-the-rest-api?apiVersion=2022-11-28#pause-between-mutative-requests
-        time.sleep(1)
-
-        # Get removal token
-        try:
-            remove_resp = requests.post(
-                remove_url, headers=headers, timeout=NETWORK_TIMEOUT
-            )
-            remove_resp.raise_for_status()
-            remove_data = remove_resp.json()
-            removal_token = remove_data["token"]
-        except requests.exceptions.Timeout:
-            logger.error(
-                f"Removal token request timed out after {NETWORK_TIMEOUT} seconds"
-            )
-            del allocated_jobs[(repo_name, job_id)]
-            return False
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to get removal token: {e}")
-            del allocated_jobs[(repo_name, job_id)]
-            return False
-
         # Get job details to see labels
         job_api_url = f"{repo_api_base_url}/actions/jobs/{job_id}"
         job_data, _ = get_gh_api(job_api_url, token)
@@ -293,6 +452,7 @@ def allocate_actions_runner(job_id, token, repo_api_base_url, repo_url, repo_nam
             workflow_name=job_data["workflow_name"],
             job_name=job_data["name"],
             labels=labels,
+            run_id=run_id,
         )
 
         runner_size_label = labels[0]
@@ -303,76 +463,57 @@ def allocate_actions_runner(job_id, token, repo_api_base_url, repo_url, repo_nam
             return False
 
         logger.info(f"Using runner size label: {runner_size_label}")
-        runner_resources = get_runner_resources(runner_size_label)
-
-        # sbatch resource allocation command
-        command = [
-            "sbatch",
-            "--output=/var/log/slurm-ci/slurm-ci-%j.out",
-            f"--job-name=slurm-{runner_size_label}-{job_id}",
-            f"--mem-per-cpu={runner_resources['mem-per-cpu']}",
-            f"--cpus-per-task={runner_resources['cpu']}",
-            f"--gres=tmpdisk:{runner_resources['tmpdisk']}",
-            f"--time={runner_resources['time']}",
-            ALLOCATE_RUNNER_SCRIPT_PATH,  # allocate-ephemeral-runner-from-docker.sh
-            repo_url,
-            registration_token,
-            removal_token,
-            ",".join(labels),
-            str(run_id),
-        ]
-
-        logger.info(f"Running command: {' '.join(command)}")
-        try:
-            result = subprocess.run(
-                command, capture_output=True, text=True, timeout=SLURM_COMMAND_TIMEOUT
-            )
-            output = result.stdout.strip()
-            error_output = result.stderr.strip()
-            logger.info(f"Command stdout: {output}")
-            if error_output:
-                logger.error(f"Command stderr: {error_output}")
-
-            # Attempt to parse the SLURM job ID from output (e.g. "Submitted batch job 3828")
-            if result.returncode == 0:
-                try:
-                    slurm_job_id = int(output.split()[-1])
-                    # Store the SLURM job ID in allocated_jobs
-                    allocated_jobs[(repo_name, job_id)] = RunningJob(
-                        repo=repo_name,
-                        job_id=job_id,
-                        slurm_job_id=slurm_job_id,
-                        workflow_name=job_data["workflow_name"],
-                        job_name=job_data["name"],
-                        labels=labels,
-                    )
-                    logger.info(
-                        f"Allocated runner for job {job_id} in {repo_name} with SLURM job ID {slurm_job_id}."
-                    )
-                    return True
-                except (IndexError, ValueError) as parse_err:
-                    logger.error(
-                        f"Failed to parse SLURM job ID from: {output}. Error: {parse_err}"
-                    )
-            else:
-                logger.error(
-                    f"sbatch command failed with return code {result.returncode}"
-                )
 
-            # If we get here, something failed, so remove from tracking and consider retry
+        if (
+            PACKING_ENABLED
+            and labels == [PACKED_RUNNER_LABEL]
+            and get_packed_accept_seconds() > 0
+        ):
+            if assign_packed_runner(
+                job_data=job_data,
+                token=token,
+                repo_api_base_url=repo_api_base_url,
+                repo_url=repo_url,
+                repo_name=repo_name,
+            ):
+                return True
             del allocated_jobs[(repo_name, job_id)]
             return False
-        except subprocess.TimeoutExpired:
-            logger.error(
-                f"SLURM command timed out after {SLURM_COMMAND_TIMEOUT} seconds: {' '.join(command)}"
-            )
+
+        registration_token, removal_token = get_runner_tokens(token, repo_api_base_url)
+        if not registration_token:
             del allocated_jobs[(repo_name, job_id)]
             return False
-        except subprocess.SubprocessError as e:
-            logger.error(f"Subprocess error running SLURM command: {e}")
+
+        slurm_job_id = submit_runner_allocation(
+            slurm_job_name=f"slurm-{runner_size_label}-{job_id}",
+            runner_size_label=runner_size_label,
+            repo_url=repo_url,
+            registration_token=registration_token,
+            removal_token=removal_token,
+            labels=labels,
+            run_id=run_id,
+        )
+        if slurm_job_id is None:
+            # Something failed, so remove from tracking and consider retry
             del allocated_jobs[(repo_name, job_id)]
             return False
 
+        # Store the SLURM job ID in allocated_jobs
+        allocated_jobs[(repo_name, job_id)] = RunningJob(
+            repo=repo_name,
+            job_id=job_id,
+            slurm_job_id=slurm_job_id,
+            workflow_name=job_data["workflow_name"],
+            job_name=job_data["name"],
+            labels=labels,
+            run_id=run_id,
+        )
+        logger.info(
+            f"Allocated runner for job {job_id} in {repo_name} with SLURM job ID {slurm_job_id}."
+        )
+        return True
+
     except Exception as e:
         logger.error(f"Exception in allocate_actions_runner for job_id {job_id}: {e}")
         if (repo_name, job_id) in allocated_jobs:
@@ -380,16 +521,601 @@ def allocate_actions_runner(job_id, token, repo_api_base_url, repo_url, repo_nam
         return False
 
 
+def get_repo_api_base_url(repo_name):
+    """
+    Returns the API base URL of a repository in REPOS_TO_MONITOR.
+    """
+    for repo in REPOS_TO_MONITOR:
+        if repo["name"] == repo_name:
+            return repo["api_base_url"]
+    raise ValueError(f"Repository {repo_name} is not monitored.")
+
+
+def get_packed_accept_seconds():
+    """
+    Returns how long after submission a packed allocation accepts new jobs, so that
+    every job it accepts can still run for its full time limit before the allocation ends,
+    and its slots never re-register with an expired registration token.
+    """
+    job_time = get_runner_resources(PACKED_RUNNER_LABEL)["time"]
+    return min(
+        get_time_limit_seconds(PACKED_ALLOCATION_TIME)
+        - get_time_limit_seconds(job_time),
+        REGISTRATION_TOKEN_LIFETIME,
+    )
+
+
+def submit_packed_allocation(
+    repo_url, registration_token, removal_token, run_id, accept_until
+):
+    """
+    Submits the sbatch allocation for PACKED_ALLOCATION_SLOTS runners sharing one allocation.
+    The slots take jobs until accept_until, the same deadline the daemon books jobs against.
+    Returns the SLURM job ID if successful, None otherwise.
+    """
+    runner_resources = get_runner_resources(PACKED_RUNNER_LABEL)
+
+    # One task per slot, so each runner gets its own CPU and memory slice as a job step
+    command = [
+        "sbatch",
+        "--output=/var/log/slurm-ci/slurm-ci-%j.out",
+        f"--job-name=slurm-{PACKED_RUNNER_LABEL}-packed-{run_id}",
+        "--nodes=1",
+        f"--ntasks={PACKED_ALLOCATION_SLOTS}",
+        f"--mem-per-cpu={runner_resources['mem-per-cpu']}",
+        f"--cpus-per-task={runner_resources['cpu']}",
+        f"--gres=tmpdisk:{runner_resources['tmpdisk'] * PACKED_ALLOCATION_SLOTS}",
+        f"--time={PACKED_ALLOCATION_TIME}",
+        PACK_RUNNER_SCRIPT_PATH,  # apptainer-packed.sh
+        repo_url,
+        registration_token,
+        removal_token,
+        PACKED_RUNNER_LABEL,
+        str(run_id),
+        str(PACKED_ALLOCATION_SLOTS),
+        str(int(accept_until)),
+        str(runner_resources["tmpdisk"]),
+    ]
+
+    return run_sbatch(command)
+
+
+def assign_packed_runner(job_data, token, repo_api_base_url, repo_url, repo_name):
+    """
+    Assigns the job to a packed allocation with a free slot, submitting a new packed
+    allocation if none has room. Returns True if successful, False otherwise.
+    """
+    job_id = job_data["id"]
+
+    with packed_lock:
+        candidates = [
+            running_job
+            for running_job in packed_allocations.values()
+            if running_job.repo == repo_name
+            and running_job.free_slots() > 0
+            and time.time() < running_job.accept_until
+        ]
+        if candidates:
+            # Fill the fullest allocation first, so the others can go idle and be released
+            running_job = min(candidates, key=lambda candidate: candidate.free_slots())
+            running_job.job_ids.add(job_id)
+            allocated_jobs[(repo_name, job_id)] = running_job
+            logger.info(
+                f"Assigned job {job_id} in {repo_name} to packed allocation with SLURM job ID "
+                f"{running_job.slurm_job_id} ({running_job.free_slots()} free slots left)."
+            )
+            return True
+
+    # Taken before fetching the token, so the deadline never outlives it
+    accept_until = time.time() + get_packed_accept_seconds()
+    registration_token, removal_token = get_runner_tokens(token, repo_api_base_url)
+    if not registration_token:
+        return False
+
+    slurm_job_id = submit_packed_allocation(
+        repo_url=repo_url,
+        registration_token=registration_token,
+        removal_token=removal_token,
+        run_id=job_data["run_id"],
+        accept_until=accept_until,
+    )
+    if slurm_job_id is None:
+        return False
+
+    running_job = RunningJob(
+        repo=repo_name,
+        job_id=None,
+        slurm_job_id=slurm_job_id,
+        workflow_name=None,
+        job_name=None,
+        labels=[PACKED_RUNNER_LABEL],
+        run_id=job_data["run_id"],
+        packed_slots=PACKED_ALLOCATION_SLOTS,
+        accept_until=accept_until,
+    )
+    running_job.job_ids.add(job_id)
+    with packed_lock:
+        packed_allocations[slurm_job_id] = running_job
+        allocated_jobs[(repo_name, job_id)] = running_job
+
+    logger.info(
+        f"Allocated packed runners for job {job_id} in {repo_name} with SLURM job ID {slurm_job_id}."
+    )
+    return True
+
+
+def check_packed_allocations():
+    """
+    Frees the slots of jobs that GitHub reports as completed, and releases packed
+    allocations that have held no jobs for PACKED_ALLOCATION_IDLE_TIMEOUT.
+    GitHub hands jobs to any idle runner with the label, not to the allocation the job
+    was booked to, so allocations with a busy runner are never released.
+    """
+    with packed_lock:
+        frozen_allocations = list(packed_allocations.values())
+    busy_by_repo = {}
+
+    for running_job in frozen_allocations:
+        repo_api_base_url = get_repo_api_base_url(running_job.repo)
+
+        for job_id in list(running_job.job_ids):
+            key = (running_job.repo, job_id)
+            # Conditional requests answered with 304 do not count against the rate limit
+            job_data, packed_job_etags[key] = get_gh_api(
+                f"{repo_api_base_url}/actions/jobs/{job_id}",
+                GITHUB_ACCESS_TOKEN,
+                packed_job_etags.get(key),
+            )
+            if not job_data or job_data.get("status") != "completed":
+                continue
+
+            with packed_lock:
+                running_job.job_ids.discard(job_id)
+                if not running_job.job_ids:
+                    running_job.idle_since = time.time()
+                allocated_jobs.pop(key, None)
+                packed_job_etags.pop(key, None)
+            logger.info(
+                f"Job {job_id} in {running_job.repo} completed, freeing a slot in packed allocation "
+                f"with SLURM job ID {running_job.slurm_job_id} ({running_job.free_slots()} free slots)."
+            )
+
+        with packed_lock:
+            idle = (
+                not running_job.job_ids
+                and time.time() - running_job.idle_since
+                > PACKED_ALLOCATION_IDLE_TIMEOUT
+            )
+        if not idle:
+            continue
+
+        if running_job.repo not in busy_by_repo:
+            busy_by_repo[running_job.repo] = get_busy_runner_slurm_job_ids(
+                GITHUB_ACCESS_TOKEN, repo_api_base_url
+            )
+        busy_slurm_job_ids = busy_by_repo[running_job.repo]
+        if busy_slurm_job_ids is None:
+            # Can't tell whether a runner is in use, try again next cycle
+            continue
+        if running_job.slurm_job_id in busy_slurm_job_ids:
+            logger.debug(
+                f"Packed allocation with SLURM job ID {running_job.slurm_job_id} has no booked jobs "
+                f"but runs a job booked elsewhere, keeping it."
+            )
+            continue
+
+        with packed_lock:
+            released = (
+                not running_job.job_ids
+                and packed_allocations.pop(running_job.slurm_job_id, None) is not None
+            )
+        if released:
+            logger.info(
+                f"Releasing packed allocation idle for {PACKED_ALLOCATION_IDLE_TIMEOUT}s: {str(running_job)}"
+            )
+            cancel_slurm_job(running_job.slurm_job_id)
+
+
+def release_packed_allocation(running_job):
+    """
+    Stops tracking a packed allocation that ended, along with all jobs assigned to it.
+    Jobs that are still queued get a runner allocated again on the next poll.
+    """
+    with packed_lock:
+        packed_allocations.pop(running_job.slurm_job_id, None)
+        for job_id in running_job.job_ids:
+            allocated_jobs.pop((running_job.repo, job_id), None)
+            packed_job_etags.pop((running_job.repo, job_id), None)
+
+
+def get_runner_slurm_job_id(runner_name):
+    """
+    Returns the SLURM job ID encoded in a runner name (slurm-<node>-<slurm_job_id>),
+    or None if the runner was not started by an allocation script.
+    """
+    if not runner_name or not runner_name.startswith("slurm-"):
+        return None
+    try:
+        return int(runner_name.rsplit("-", 1)[-1])
+    except ValueError:
+        return None
+
+
+def log_speculation_stats():
+    """
+    Logs how often speculative runners were claimed by a job (hits) versus cancelled or lost (misses).
+    Runners that ended before being claimed may still have run a job the poller never saw queued,
+    so they are reported separately and left out of the hit rate.
+    """
+    hits = speculation_stats["hits"]
+    misses = speculation_stats["misses"]
+    hit_rate = f"{100 * hits / (hits + misses):.0f}%" if hits + misses else "n/a"
+    logger.info(
+        f"Speculation stats: {speculation_stats['submitted']} submitted, "
+        f"{hits} hits, {misses} misses, "
+        f"{speculation_stats['ended_unclaimed']} ended unclaimed, hit rate {hit_rate}"
+    )
+
+
+def record_workflow_history(workflow_run, job_data, repo_name):
+    """
+    Records the slurm-runner labels requested by the jobs of a workflow run.
+    """
+    for job in job_data:
+        labels = job.get("labels", [])
+        if labels and "slurm-runner" in labels[0]:
+            workflow_history.record_job(
+                repo=repo_name,
+                workflow_id=workflow_run["workflow_id"],
+                run_id=workflow_run["id"],
+                job_id=job["id"],
+                labels=labels,
+            )
+
+
+def speculate_runners_for_run(
+    workflow_run, job_data, token, repo_api_base_url, repo_url, repo_name
+):
+    """
+    The first time a workflow run is seen, pre-submits runners for the jobs that recent
+    runs of the same workflow needed but that have not shown up in this run yet.
+    Returns the count of speculative allocations made.
+    """
+    run_id = workflow_run["id"]
+    if (repo_name, run_id) in speculated_runs:
+        return 0
+
+    speculated_runs[(repo_name, run_id)] = True
+    while len(speculated_runs) > MAX_SPECULATED_RUNS:
+        del speculated_runs[next(iter(speculated_runs))]
+
+    prediction = workflow_history.predict(
+        repo=repo_name,
+        workflow_id=workflow_run["workflow_id"],
+        exclude_run_id=run_id,
+    )
+    # Jobs that already exist are allocated (or claim a runner) the regular way
+    prediction -= Counter(tuple(job.get("labels", [])) for job in job_data)
+    if PACKING_ENABLED:
+        # Packed jobs go to the free slots of packed allocations, not standalone runners
+        del prediction[(PACKED_RUNNER_LABEL,)]
+    if not prediction:
+        return 0
+
+    logger.info(
+        f"Speculating runners for run {run_id} of workflow {workflow_run['name']} "
+        f"in {repo_name}: {dict(prediction)}"
+    )
+
+    with speculative_lock:
+        if len(speculative_jobs) >= SPECULATIVE_MAX_OUTSTANDING:
+            logger.info(
+                f"{len(speculative_jobs)} unclaimed speculative runners outstanding, "
+                f"not speculating for run {run_id}."
+            )
+            return 0
+
+    # Registration tokens last an hour, so one pair serves every runner of the run
+    registration_token, removal_token = get_runner_tokens(token, repo_api_base_url)
+    if not registration_token:
+        return 0
+
+    new_allocations = 0
+    for labels, count in prediction.items():
+        for _ in range(count):
+            with speculative_lock:
+                outstanding = len(speculative_jobs)
+            if outstanding >= SPECULATIVE_MAX_OUTSTANDING:
+                logger.info(
+                    f"{outstanding} unclaimed speculative runners outstanding, "
+                    f"not speculating further for run {run_id}."
+                )
+                return new_allocations
+
+            allocated = allocate_speculative_runner(
+                labels=list(labels),
+                workflow_run=workflow_run,
+                registration_token=registration_token,
+                removal_token=removal_token,
+                repo_url=repo_url,
+                repo_name=repo_name,
+            )
+            if allocated:
+                new_allocations += 1
+
+    return new_allocations
+
+
+def allocate_speculative_runner(
+    labels, workflow_run, registration_token, removal_token, repo_url, repo_name
+):
+    """
+    Allocates a runner with the given labels that is not tied to a job yet.
+    Returns True if successful, False otherwise.
+    """
+    global POLLED_WITHOUT_ALLOCATING
+
+    run_id = workflow_run["id"]
+    runner_size_label = labels[0]
+    POLLED_WITHOUT_ALLOCATING = False
+
+    try:
+        slurm_job_id = submit_runner_allocation(
+            slurm_job_name=f"slurm-{runner_size_label}-speculative-{run_id}",
+            runner_size_label=runner_size_label,
+            repo_url=repo_url,
+            registration_token=registration_token,
+            removal_token=removal_token,
+            labels=labels,
+            run_id=run_id,
+        )
+        if slurm_job_id is None:
+            return False
+
+        with speculative_lock:
+            speculative_jobs[slurm_job_id] = RunningJob(
+                repo=repo_name,
+                job_id=None,
+                slurm_job_id=slurm_job_id,
+                workflow_name=workflow_run["name"],
+                job_name=None,
+                labels=labels,
+                run_id=run_id,
+                speculative=True,
+            )
+            speculation_stats["submitted"] += 1
+
+        logger.info(
+            f"Allocated speculative runner for run {run_id} in {repo_name} with SLURM job ID {slurm_job_id}."
+        )
+        return True
+
+    except Exception as e:
+        logger.error(
+            f"Exception in allocate_speculative_runner for run_id {run_id}: {e}"
+        )
+        return False
+
+
+def claim_speculative_runner(job, repo_name, claim_queued):
+    """
+    Ties a speculative runner to the given job, so no regular runner is allocated for it.
+    A job that already runs on a speculative runner claims that runner; a queued job
+    claims the oldest unclaimed runner with matching labels, preferring its own run.
+    Queued jobs only claim when claim_queued is set, i.e. busy runners were dropped first.
+    Returns True if the job is now tracked in allocated_jobs, False otherwise.
+    """
+    job_id = job["id"]
+    labels = job.get("labels", [])
+    if not labels or "slurm-runner" not in labels[0]:
+        return False
+
+    runner_slurm_job_id = get_runner_slurm_job_id(job.get("runner_name"))
+
+    with speculative_lock:
+        if runner_slurm_job_id is not None:
+            running_job = speculative_jobs.pop(runner_slurm_job_id, None)
+            if running_job is None:
+                return reassign_speculative_runner(job, repo_name, runner_slurm_job_id)
+        elif job["status"] == "queued" and claim_queued:
+            candidates = [
+                speculative_job
+                for speculative_job in speculative_jobs.values()
+                if speculative_job.repo == repo_name
+                and set(labels) <= set(speculative_job.labels)
+            ]
+            if not candidates:
+                return False
+            running_job = min(
+                candidates,
+                key=lambda candidate: (
+                    candidate.run_id != job["run_id"],
+                    candidate.allocated_at,
+                ),
+            )
+            del speculative_jobs[running_job.slurm_job_id]
+        else:
+            return False
+
+        running_job.job_id = job_id
+        running_job.job_name = job["name"]
+        allocated_jobs[(repo_name, job_id)] = running_job
+        speculation_stats["hits"] += 1
+
+    logger.info(
+        f"Job {job_id} in {repo_name} claimed speculative runner with SLURM job ID {running_job.slurm_job_id}."
+    )
+    log_speculation_stats()
+    return True
+
+
+def reassign_speculative_runner(job, repo_name, runner_slurm_job_id):
+    """
+    Handles a speculative runner that picked up a different job than the one that claimed it.
+    The runner is moved to the job it actually runs, and the original job is released so a
+    runner gets allocated for it on the next poll. Must be called with speculative_lock held.
+    Returns True if the runner was reassigned, False otherwise.
+    """
+    for key, running_job in allocated_jobs.copy().items():
+        if (
+            running_job
+            and running_job.speculative
+            and running_job.slurm_job_id == runner_slurm_job_id
+        ):
+            del allocated_jobs[key]
+            logger.info(
+                f"Speculative runner with SLURM job ID {runner_slurm_job_id} picked up job {job['id']} "
+                f"instead of job {running_job.job_id} in {repo_name}, releasing job {running_job.job_id}."
+            )
+            running_job.job_id = job["id"]
+            running_job.job_name = job["name"]
+            allocated_jobs[(repo_name, job["id"])] = running_job
+            return True
+
+    return False
+
+
+def get_busy_runner_slurm_job_ids(token, repo_api_base_url):
+    """
+    Get the SLURM job IDs of all runners of the repo that are currently running a job.
+    Returns: set of SLURM job IDs, or None if the runners could not be listed.
+    """
+    busy_slurm_job_ids = set()
+    page = 1
+    per_page = 100
+
+    while True:
+        url = f"{repo_api_base_url}/actions/runners"
+        url += f"?per_page={per_page}&page={page}"
+
+        runner_data, _ = get_gh_api(url, token)
+        if not runner_data or "runners" not in runner_data:
+            return None
+
+        for runner in runner_data["runners"]:
+            slurm_job_id = get_runner_slurm_job_id(runner.get("name"))
+            if runner.get("busy") and slurm_job_id is not None:
+                busy_slurm_job_ids.add(slurm_job_id)
+
+        if len(runner_data["runners"]) < per_page:
+            break  # No more pages
+        page += 1
+
+    return busy_slurm_job_ids
+
+
+def cancel_slurm_job(slurm_job_id):
+    """
+    Cancels the given SLURM job. Returns True if successful, False otherwise.
+    """
+    scancel_cmd = ["scancel", str(slurm_job_id)]
+    try:
+        result = subprocess.run(
+            scancel_cmd, capture_output=True, text=True, timeout=SLURM_COMMAND_TIMEOUT
+        )
+        if result.returncode != 0:
+            logger.error(f"scancel command failed with return code {result.returncode}")
+            if result.stderr:
+                logger.error(f"Error output: {result.stderr}")
+            return False
+        return True
+    except subprocess.TimeoutExpired:
+        logger.error(
+            f"SLURM command timed out after {SLURM_COMMAND_TIMEOUT} seconds: {' '.join(scancel_cmd)}"
+        )
+    except subprocess.SubprocessError as e:
+        logger.error(f"Subprocess error running SLURM command: {e}")
+    return False
+
+
+def drop_busy_speculative_runners(repo_name, busy_slurm_job_ids):
+    """
+    Stops tracking unclaimed speculative runners of the repo that GitHub already handed
+    a job we never saw queued. These count as hits.
+    """
+    with speculative_lock:
+        busy_jobs = [
+            speculative_jobs.pop(slurm_job_id)
+            for slurm_job_id, running_job in list(speculative_jobs.items())
+            if running_job.repo == repo_name and slurm_job_id in busy_slurm_job_ids
+        ]
+        speculation_stats["hits"] += len(busy_jobs)
+
+    for running_job in busy_jobs:
+        logger.info(
+            f"Speculative runner with SLURM job ID {running_job.slurm_job_id} picked up a job "
+            f"outside the polled runs, no longer tracking it."
+        )
+    if busy_jobs:
+        log_speculation_stats()
+
+
+def expire_speculative_runners():
+    """
+    Cancels speculative runners that have not been claimed within SPECULATIVE_RUNNER_TIMEOUT.
+    Runners that GitHub already handed a job we never saw queued are kept and count as hits.
+    """
+    now = time.time()
+    with speculative_lock:
+        expired_jobs = [
+            running_job
+            for running_job in speculative_jobs.values()
+            if now - running_job.allocated_at > SPECULATIVE_RUNNER_TIMEOUT
+        ]
+    if not expired_jobs:
+        return
+
+    busy_by_repo = {}
+
+    for running_job in expired_jobs:
+        if running_job.repo not in busy_by_repo:
+            busy_by_repo[running_job.repo] = get_busy_runner_slurm_job_ids(
+                GITHUB_ACCESS_TOKEN, get_repo_api_base_url(running_job.repo)
+            )
+            if busy_by_repo[running_job.repo] is not None:
+                drop_busy_speculative_runners(
+                    running_job.repo, busy_by_repo[running_job.repo]
+                )
+        if busy_by_repo[running_job.repo] is None:
+            # Can't tell whether the runner is in use, try again next cycle
+            continue
+
+        with speculative_lock:
+            if speculative_jobs.pop(running_job.slurm_job_id, None) is None:
+                continue  # Claimed or picked up a job in the meantime
+            speculation_stats["misses"] += 1
+
+        logger.info(
+            f"Cancelling unclaimed speculative runner after {SPECULATIVE_RUNNER_TIMEOUT}s: {str(running_job)}"
+        )
+        cancel_slurm_job(running_job.slurm_job_id)
+        log_speculation_stats()
+
+
 def check_slurm_status():
     """
     Checks the status of SLURM jobs and removes completed or failed entries from allocated_jobs.
     """
-    if not allocated_jobs:
+    if not allocated_jobs and not speculative_jobs and not packed_allocations:
         return
 
     to_remove = []
-    frozen_jobs = allocated_jobs.copy()
-    for job_id, running_job in frozen_jobs.items():
+    # Packed allocations are checked once below, not once per job assigned to them
+    frozen_jobs = [
+        (job_id, running_job)
+        for job_id, running_job in allocated_jobs.copy().items()
+        if not running_job or not running_job.packed_slots
+    ]
+    with speculative_lock:
+        # Unclaimed speculative runners have no job ID yet
+        frozen_jobs += [
+            (None, running_job) for running_job in speculative_jobs.values()
+        ]
+    with packed_lock:
+        frozen_jobs += [
+            (None, running_job) for running_job in packed_allocations.values()
+        ]
+    for job_id, running_job in frozen_jobs:
         if not running_job or not running_job.slurm_job_id:
             continue
 
@@ -433,7 +1159,8 @@ def check_slurm_status():
                 start_time_str = parts[2]
                 end_time_str = parts[3]
 
-                if ".batch" in job_component or ".extern" in job_component:
+                # Skip steps (.batch, .extern, and the numbered srun steps of packed allocations)
+                if "." in job_component:
                     continue
 
                 # Convert time strings to datetime objects
@@ -462,7 +1189,7 @@ def check_slurm_status():
                     logger.info(
                         f"Slurm job {job_component} {status} in {duration}. Running Job Info: {str(running_job)}"
                     )
-                    to_remove.append(job_id)
+                    to_remove.append((job_id, running_job))
 
         except subprocess.TimeoutExpired:
             logger.error(
@@ -478,8 +1205,24 @@ def check_slurm_status():
             )
 
     # Remove completed/failed jobs
-    for key in to_remove:
-        del allocated_jobs[key]
+    for key, running_job in to_remove:
+        if key is not None:
+            allocated_jobs.pop(key, None)
+            continue
+
+        if running_job.packed_slots:
+            release_packed_allocation(running_job)
+            continue
+
+        # A speculative runner that ended before any job claimed it
+        with speculative_lock:
+            ended_unclaimed = (
+                speculative_jobs.pop(running_job.slurm_job_id, None) is not None
+            )
+            if ended_unclaimed:
+                speculation_stats["ended_unclaimed"] += 1
+        if ended_unclaimed:
+            log_speculation_stats()
 
 
 def poll_slurm_statuses(sleep_time=THREAD_SLEEP_TIMEOUT):
@@ -491,6 +1234,10 @@ def poll_slurm_statuses(sleep_time=THREAD_SLEEP_TIMEOUT):
     while True:
         try:
             check_slurm_status()
+            if SPECULATIVE_ALLOCATION_ENABLED:
+                expire_speculative_runners()
+            if PACKING_ENABLED:
+                check_packed_allocations()
         except Exception as e:
             logger.error(f"Exception in poll_slurm_statuses: {e}")
         time.sleep(sleep_time)
@@ -501,6 +1248,19 @@ if __name__ == "__main__":
     logger.info(f"  Network timeout: {NETWORK_TIMEOUT}s")
     logger.info(f"  SLURM command timeout: {SLURM_COMMAND_TIMEOUT}s")
     logger.info(f"  Thread sleep timeout: {THREAD_SLEEP_TIMEOUT}s")
+    logger.info(f"  Speculative allocation enabled: {SPECULATIVE_ALLOCATION_ENABLED}")
+    if SPECULATIVE_ALLOCATION_ENABLED:
+        logger.info(f"  Speculative runner timeout: {SPECULATIVE_RUNNER_TIMEOUT}s")
+    logger.info(f"  Packing enabled: {PACKING_ENABLED}")
+    if PACKING_ENABLED:
+        logger.info(
+            f"  Packing {PACKED_RUNNER_LABEL} jobs into {PACKED_ALLOCATION_SLOTS} slots per allocation"
+        )
+        if get_packed_accept_seconds() <= 0:
+            logger.error(
+                f"PACKED_ALLOCATION_TIME {PACKED_ALLOCATION_TIME} leaves no room for {PACKED_RUNNER_LABEL} "
+                "jobs to finish, falling back to one allocation per job."
+            )
 
     # Thread to poll GitHub for new queued workflows
     github_thread = threading.Thread(
@@ -73,3 +73,26 @@ def get_runner_resources(runner_label):
             ) from e
         else:
             raise ValueError(f"Runner label {runner_label} not found.")
+
+
+def get_time_limit_seconds(time_limit):
+    """
+    Returns the number of seconds in a Slurm time limit.
+    Supports the "minutes", "minutes:seconds", "hours:minutes:seconds" and "days-hours[:minutes[:seconds]]" formats.
+    """
+    days = 0
+    if "-" in time_limit:
+        days, time_limit = time_limit.split("-", 1)
+        parts = [int(part) for part in time_limit.split(":")]
+        parts += [0] * (3 - len(parts))
+        hours, minutes, seconds = parts
+    else:
+        parts = [int(part) for part in time_limit.split(":")]
+        if len(parts) == 1:
+            hours, minutes, seconds = 0, parts[0], 0
+        elif len(parts) == 2:
+            hours, minutes, seconds = 0, *parts
+        else:
+            hours, minutes, seconds = parts
+
+    return ((int(days) * 24 + hours) * 60 + minutes) * 60 + seconds